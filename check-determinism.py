@@ -0,0 +1,77 @@
+# Copyright (C) 2021 Games Computers Play <https://github.com/gamescomputersplay> and nopeless
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Check that a seeded simulation gives the same output whatever the number of
+# worker processes: runs monopoly-simulator.py with each worker count and
+# compares what it prints and the data file it writes.
+#
+# usage: python check-determinism.py [workers ...]   (default: 1 3 4)
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIMULATOR = os.path.join(HERE, "monopoly-simulator.py")
+
+# settings of the checked runs, written to the config.py of each run
+SETTINGS = """
+log = False
+nSimulations = 300
+SEED = 5
+show_progress_bar = False
+writeData = {write_data!r}
+n_processes = {workers}
+"""
+DATA_MODES = ("last_turn", "remaining_players")
+DATA_FILES = ("data.txt", "data.bin")
+
+
+def run(workers, write_data):
+    """Run a simulation, return its output (without the timing) and data files"""
+    with tempfile.TemporaryDirectory() as run_dir:
+        # the simulator goes next to the config, so no other config.py is used
+        shutil.copy(SIMULATOR, run_dir)
+        with open(os.path.join(run_dir, "config.py"), "w") as fs:
+            fs.write(SETTINGS.format(workers=workers, write_data=write_data))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            path for path in (HERE, env.get("PYTHONPATH")) if path
+        )
+        out = subprocess.run(
+            [sys.executable, "monopoly-simulator.py"],
+            cwd=run_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        out = "".join(line for line in out.splitlines(True) if "Done in" not in line)
+        data = {}
+        for name in DATA_FILES:
+            path = os.path.join(run_dir, name)
+            if os.path.exists(path):
+                with open(path, "rb") as fs:
+                    data[name] = fs.read()
+        return out, data
+
+
+def main(worker_counts):
+    failed = False
+    for write_data in DATA_MODES:
+        expected = run(worker_counts[0], write_data)
+        for workers in worker_counts[1:]:
+            same = run(workers, write_data) == expected
+            failed |= not same
+            print(
+                f"{write_data}: {workers} workers vs {worker_counts[0]}:",
+                "same" if same else "DIFFERENT",
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main([int(arg) for arg in sys.argv[1:]] or [1, 3, 4]))
@@ -7,12 +7,15 @@
 # https://www.youtube.com/watch?v=6EJrZeN0jNI
 # https://www.youtube.com/watch?v=Dx1ofZHGUtI
 
-import random
-import math
+import collections
+import heapq
+import mmap
+import multiprocessing
+import os
 import time
 import matplotlib.pyplot as plt
 import numpy as np
-import progressbar
+from tqdm import tqdm
 
 import util
 
@@ -23,6 +26,7 @@ nSimulations = 1000
 SEED = None
 shuffle_players = True
 realTime = False  # Allow step by step execution via space/enter key
+n_processes = None  # Worker processes to play games in (None: one per CPU, 1: none)
 
 # some game rules
 settingStartingMoney = 1500
@@ -62,7 +66,7 @@ showResult = True  # only for 1 game: show final money score
 showRemPlayers = True
 writeLog = False  # write log with game events (log.txt file)
 
-# Various raw data to output (to data.txt file)
+# Various raw data to output (to data.txt, or data.bin for the binary ones)
 # writeData = "none"
 # writeData = "popular_cells" # Cells to land
 # writeData = "last_turn" # Length of the game
@@ -87,40 +91,174 @@ except ImportError:
     print("No config file found, using default settings")
 
 # seed number generator
-random_dice = random.Random(SEED)
-random_shuffle = random.Random(SEED)
+rng = np.random.default_rng(SEED)
+
+# game events are only logged with writeLog on, skip building them otherwise
+LOG_ENABLED = writeLog
+
+# net worth history is stored as raw int32 rows, remaining players as a byte
+# per game, the other data as text lines
+DATA_BINARY = writeData in ("net_worth", "remaining_players")
+DATA_FILE = "data.bin" if DATA_BINARY else "data.txt"
+# data that analyze_data reports as how often each line turns up
+DATA_COUNTED = writeData in ("losers_names", "experiment", "remaining_players")
 
 
 class Log:
+    # indentation of the log lines, by level
+    TABS = [b"\t" * level for level in range(5)]
+
     def __init__(self):
-        for n in ["log.txt", "data.txt"]:
+        for n in ["log.txt", DATA_FILE]:
             with open(n, "w") as f:
                 f.write("")
-        # Use explicit form of append logging
-        self.datafs = open("data.txt", "ab", 0)
-        self.fs = open("log.txt", "ab", 0)
+        # Use explicit form of append logging, in big buffers
+        self.datafs = open(DATA_FILE, "ab", buffering=1 << 20)
+        self.fs = open("log.txt", "ab", buffering=1 << 20)
+        # data lines of the current game
+        self.lines = []
 
     def close(self):
         self.datafs.close()
         self.fs.close()
 
+    # write out the buffered lines, so log.txt can be watched game by game
+    def flush(self):
+        self.datafs.flush()
+        self.fs.flush()
+
+    # data lines are kept until the game is over, the game log is written out
     def write(self, text, level=0, data=False):
         if data and writeData:
-            self.datafs.write(bytes(text + "\n", "utf-8"))
+            self.lines.append(text)
             return
         if writeLog:
             if level < 2:
-                self.fs.write(bytes("\n" * (2 - level), "utf-8"))
-            self.fs.write(bytes("\t" * level + text + "\n", "utf-8"))
+                self.fs.write(b"\n" * (2 - level))
+            self.fs.write(self.TABS[level] + (text + "\n").encode())
+
+    # data lines of the game so far, handed over to be written by write_data
+    def take_lines(self):
+        lines, self.lines = self.lines, []
+        return lines
+
+    # write a batch of data lines (or binary blocks) to the data file in one go
+    def write_data(self, lines):
+        if lines:
+            if DATA_BINARY:
+                self.datafs.write(b"".join(lines))
+            else:
+                self.datafs.write(("\n".join(lines) + "\n").encode())
+
+
+class WorkerLog(Log):
+    """Log of a worker process
+
+    Games in workers run without the game log, and their data lines are
+    handed back to the main process to write, so the data file has one writer.
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def close(self):
+        pass
+
+    def flush(self):
+        pass
+
+
+class DicePool:
+    """Dice pairs rolled in bulk with numpy and handed out one pair at a time"""
+
+    def __init__(self, generator, size):
+        self.size = size
+        self.pairs = []
+        self.reset(generator)
+
+    # drop the rolled dice, roll the next ones with this generator
+    def reset(self, generator):
+        self.generator = generator
+        self.cursor = self.size  # first batch is rolled on the first roll
+
+    # roll the next batch of dice pairs
+    def refill(self):
+        self.pairs = self.generator.integers(
+            1, 7, size=(self.size, 2), dtype=np.int8
+        ).tolist()
+        self.cursor = 0
+
+    # get the next pair of dice
+    def roll(self):
+        if self.cursor == self.size:
+            self.refill()
+        dice1, dice2 = self.pairs[self.cursor]
+        self.cursor += 1
+        return dice1, dice2
+
+
+class Deck:
+    """Chance or Community Chest cards
+
+    Cards are drawn from the top and put back at the bottom, a deque does
+    both in constant time.
+    """
+
+    def __init__(self, size):
+        self.cards = collections.deque(range(size))
+        self.size = size
+
+    # gather all the cards (including GOOJF kept by players) and shuffle them
+    def reset(self):
+        self.cards.clear()
+        self.cards.extend(rng.permutation(self.size).tolist())
+
+    # take the card from the top of the deck
+    def draw(self):
+        return self.cards.popleft()
+
+    # put the card back at the bottom of the deck
+    def put(self, card):
+        self.cards.append(card)
 
 
 class Player:
     """Player class"""
 
+    __slots__ = (
+        "name",
+        "position",
+        "money",
+        "consequent_doubles",
+        "in_jail",
+        "days_in_jail",
+        "has_jail_card_chance",
+        "has_jail_card_community",
+        "is_bankrupt",
+        "has_mortgages",
+        "plots_wanted",
+        "plots_offered",
+        "plots_to_build",
+        "cash_limit",
+        "dice",
+        "starting_money",
+        "n_railroads",
+        "plots_worth",
+        "plots_worth_version",
+    )
+
     def __init__(self, name, starting_money):
         self.name = name
+        self.starting_money = starting_money
+        self.cash_limit = (
+            exp_unspendable_cash if name == "exp" else behave_unspendable_cash
+        )
+        self.reset()
+
+    # get ready for a new game
+    def reset(self):
         self.position = 0
-        self.money = starting_money
+        self.money = self.starting_money
         self.consequent_doubles = 0
         self.in_jail = False
         self.days_in_jail = 0
@@ -129,12 +267,13 @@ class Player:
         self.is_bankrupt = False
         self.has_mortgages = []
         self.plots_wanted = []
-        self.plots_offered = []
+        self.plots_offered = frozenset()
         self.plots_to_build = []
-        self.cash_limit = (
-            exp_unspendable_cash if name == "exp" else behave_unspendable_cash
-        )
         self.dice = (0, 0)
+        self.n_railroads = 0  # kept up to date by Board.set_owner
+        # worth of the plots, as of board.version (see net_worth)
+        self.plots_worth = 0
+        self.plots_worth_version = -1
 
     def __str__(self):
         return (
@@ -165,7 +304,8 @@ class Player:
     # subtract money (pay rent, buy property etc)
     def move_to(self, position):
         self.position = position
-        log.write(self.name + " moves to cell " + str(position), 3)
+        if LOG_ENABLED:
+            log.write(f"{self.name} moves to cell {position}", 3)
 
     # make a move procedure
 
@@ -181,15 +321,18 @@ class Player:
         if writeData == "popular_cells":
             log.write(str(self.position), data=True)
 
-        log.write("Player " + self.name + " goes:", 2)
+        if LOG_ENABLED:
+            log.write(f"Player {self.name} goes:", 2)
 
         # non-board actions: Trade, unmortgage, build
         # repay mortgage if you have X times more cashe than mortgage cost
-        while self.repay_mortgage():
+        while self.has_mortgages and self.repay_mortgage(board):
             board.recalculate_after_property_change()
 
         # build houses while you have pare cash
-        while board.improve_property(self, self.money - self.cash_limit):
+        while self.plots_to_build and board.improve_property(
+            self, self.money - self.cash_limit
+        ):
             pass
 
         # Calculate property player wants to get and ready to give away
@@ -205,30 +348,21 @@ class Player:
                 self.three_way_trade(board)
 
         # roll dice
-        dice1 = random_dice.randint(1, 6)
-        dice2 = random_dice.randint(1, 6)
-        log.write(
-            self.name
-            + " rolls "
-            + str(dice1)
-            + " and "
-            + str(dice2)
-            + " = "
-            + str(dice1 + dice2),
-            3,
-        )
+        dice1, dice2 = board.dice_pool.roll()
+        if LOG_ENABLED:
+            log.write(f"{self.name} rolls {dice1} and {dice2} = {dice1 + dice2}", 3)
         self.dice = (dice1, dice2)
 
         # doubles
         if dice1 == dice2 and not self.in_jail:
             go_again = True  # go again if doubles
             self.consequent_doubles += 1
-            log.write(
-                "it's a number " + str(self.consequent_doubles) + " double in a row", 3
-            )
+            if LOG_ENABLED:
+                log.write(f"it's a number {self.consequent_doubles} double in a row", 3)
             if self.consequent_doubles == 3:  # but go to jail if 3 times in a row
                 self.in_jail = True
-                log.write(self.name + " goes to jail on consequtive doubles", 3)
+                if LOG_ENABLED:
+                    log.write(f"{self.name} goes to jail on consequtive doubles", 3)
                 self.move_to(10)
                 self.consequent_doubles = 0
                 return False
@@ -240,27 +374,33 @@ class Player:
         if self.in_jail:
             if self.has_jail_card_chance:
                 self.has_jail_card_chance = False
-                board.chanceCards.append(1)  # return the card
-                log.write(
-                    self.name + " uses the Chance GOOJF card to get out of jail", 3
-                )
+                board.chanceCards.put(1)  # return the card
+                if LOG_ENABLED:
+                    log.write(
+                        f"{self.name} uses the Chance GOOJF card to get out of jail", 3
+                    )
             elif self.has_jail_card_community:
                 self.has_jail_card_community = False
-                board.communityCards.append(6)  # return the card
-                log.write(
-                    self.name + " uses the Community GOOJF card to get out of jail", 3
-                )
+                board.communityCards.put(6)  # return the card
+                if LOG_ENABLED:
+                    log.write(
+                        f"{self.name} uses the Community GOOJF card to get out of jail",
+                        3,
+                    )
             elif dice1 != dice2:
                 self.days_in_jail += 1
                 if self.days_in_jail < 3:
-                    log.write(self.name + " spends this turn in jail", 3)
+                    if LOG_ENABLED:
+                        log.write(f"{self.name} spends this turn in jail", 3)
                     return False  # skip turn in jail
                 else:
                     self.take_money(settingJailFine)  # get out on fine
                     self.days_in_jail = 0
-                    log.write(self.name + " pays fine and gets out of jail", 3)
+                    if LOG_ENABLED:
+                        log.write(f"{self.name} pays fine and gets out of jail", 3)
             else:  # get out of jail on doubles
-                log.write(self.name + " rolls double and gets out of jail", 3)
+                if LOG_ENABLED:
+                    log.write(f"{self.name} rolls double and gets out of jail", 3)
                 self.days_in_jail = 0
                 go_again = False
         self.in_jail = False
@@ -274,66 +414,51 @@ class Player:
             self.position = self.position - 40
             # get salary for passing GO
             self.add_money(settingsSalary)
-            log.write(self.name + " gets salary: $" + str(settingsSalary), 3)
+            if LOG_ENABLED:
+                log.write(f"{self.name} gets salary: ${settingsSalary}", 3)
 
-        owner_name = ""
-        if hasattr(board.b[self.position], 'owner'):
-            if hasattr(board.b[self.position].owner, 'name'):
-                owner_name = board.b[self.position].owner.name
-        log.write(
-            self.name
-            + " moves to cell "
-            + str(self.position)
-            + ": "
-            + board.b[self.position].name
-            + owner_name,
-            3,
-        )
+        cell = board.b[self.position]
+        if LOG_ENABLED:
+            owner = cell.owner if board.ownable[self.position] else None
+            owner_name = f" ({owner.name})" if owner is not None else ""
+            log.write(
+                f"{self.name} moves to cell {self.position}: {cell.name}{owner_name}", 3
+            )
 
         # perform action of the cell player ended on
-        board.action(self, self.position)
+        board.action_cell(self, cell, self.position)
 
         # check if bankrupt after the action
         self.check_bankruptcy(board)
 
         if go_again:
-            log.write(self.name + " will go again now", 3)
+            if LOG_ENABLED:
+                log.write(f"{self.name} will go again now", 3)
             return True  # make a move again
         return False  # no extra move
 
-    # get the cheapest mortgage property (name, price)
+    # get the cheapest mortgage (price, cell index), has_mortgages is a min-heap
 
     def cheapest_mortgage(self):
-        cheapest = False
-        for mortgage in self.has_mortgages:
-            if not cheapest or mortgage[1] < cheapest[1]:
-                cheapest = mortgage
-        return cheapest
+        return self.has_mortgages[0] if self.has_mortgages else None
 
     # Chance card make general repairs: 25/house 100/hotel
     def make_repairs(self, board, repairtype):
-        repair_cost = 0
         if repairtype == "chance":
             per_house, per_hotel = 25, 100
         else:
             per_house, per_hotel = 40, 115
-        log.write(
-            "Repair cost: $"
-            + str(per_house)
-            + " per house, $"
-            + str(per_hotel)
-            + " per hotel",
-            3,
-        )
+        if LOG_ENABLED:
+            log.write(f"Repair cost: ${per_house} per house, ${per_hotel} per hotel", 3)
 
-        for plot in board.b:
-            if type(plot) == Property and plot.owner == self:
-                if plot.hasHouses == 5:
-                    repair_cost += per_hotel
-                else:
-                    repair_cost += plot.hasHouses * per_house
+        owned = [board.b[i] for i in board.property_indices if board.b[i].owner is self]
+        repair_cost = sum(
+            per_hotel if plot.hasHouses == 5 else plot.hasHouses * per_house
+            for plot in owned
+        )
         self.take_money(repair_cost)
-        log.write(self.name + " pays total repair costs $" + str(repair_cost), 3)
+        if LOG_ENABLED:
+            log.write(f"{self.name} pays total repair costs ${repair_cost}", 3)
 
     # check if player has negative money
     # if so, start selling stuff and mortgage plots
@@ -341,18 +466,21 @@ class Player:
 
     def check_bankruptcy(self, board):
         if self.money < 0:
-            log.write(self.name + " doesn't have enough cash", 3)
+            if LOG_ENABLED:
+                log.write(f"{self.name} doesn't have enough cash", 3)
             while self.money < 0:
                 worst_asset = board.choose_property_to_mortgage_downgrade(self)
-                if not worst_asset:
+                if worst_asset is None:
                     self.is_bankrupt = True
+                    board.alive -= 1
                     board.sell_all(self)
                     board.recalculate_after_property_change()
-                    log.write(
-                        self.name
-                        + " is now bankrupt. Their property is back on board.",
-                        3,
-                    )
+                    if LOG_ENABLED:
+                        log.write(
+                            f"{self.name} is now bankrupt. "
+                            "Their property is back on board.",
+                            3,
+                        )
 
                     # to track players who lost
                     if writeData == "losers_names":
@@ -364,29 +492,35 @@ class Player:
 
                     return
                 else:
-                    board.b[worst_asset].mortgage(self, board)
+                    board.b[worst_asset].mortgage(self, board, worst_asset)
                     board.recalculate_after_property_change()
 
     # Calculate net worth of a player (for property tax)
+    # worth of the plots is only recounted if the board changed since last time
     def net_worth(self, board):
-        worth = self.money
-        for plot in board.b:
-            if type(plot) == Property and plot.owner == self:
-                if plot.is_mortgaged:
-                    worth += plot.cost_base // 2
-                else:
-                    worth += plot.cost_base
-                    worth += plot.cost_house * plot.hasHouses
-        return worth
+        if self.plots_worth_version != board.version:
+            owned = [
+                board.b[i] for i in board.property_indices if board.b[i].owner is self
+            ]
+            self.plots_worth = sum(
+                plot.cost_base // 2
+                if plot.is_mortgaged
+                else plot.cost_base + plot.cost_house * plot.hasHouses
+                for plot in owned
+            )
+            self.plots_worth_version = board.version
+        return self.money + self.plots_worth
 
     # Behaviours
 
     # if there is a mortgage with pay less then current money // behaveUnmortgageCoeff
     # repay the mortgage
-    def repay_mortgage(self):
+    def repay_mortgage(self, board):
         cheapest = self.cheapest_mortgage()
-        if cheapest and self.money > cheapest[1] * behaveUnmortgageCoeff:
-            cheapest[0].unmortgage(self)
+        if cheapest is not None and self.money > cheapest[0] * behaveUnmortgageCoeff:
+            heapq.heappop(self.has_mortgages)
+            board.b[cheapest[1]].unmortgage(self, cheapest[0])
+            board.mark_dirty(board.b[cheapest[1]])
             return True
         return False
 
@@ -394,9 +528,8 @@ class Player:
     def wants_to_buy(self, cost, group):
 
         if self.name == "exp" and group == expRefuseProperty:
-            log.write(
-                self.name + " refuses to buy " + expRefuseProperty + " property", 3
-            )
+            if LOG_ENABLED:
+                log.write(f"{self.name} refuses to buy {expRefuseProperty} property", 3)
             return False
         if self.money > cost + self.cash_limit:  # leave some money just in case
             return True
@@ -405,28 +538,27 @@ class Player:
 
     # Look for and perform a two-way trade
     def two_way_trade(self, board):
+        # nothing to trade for, or nothing to trade with
+        if not self.plots_wanted or not self.plots_offered:
+            return False
         trade_happened = False
-        for i_want in self.plots_wanted[::-1]:
+        for i_want in reversed(self.plots_wanted):
             owner_of_wanted = board.b[i_want].owner
             if owner_of_wanted is None:
                 continue
             # Find a match betwee what I want / they want / I have / they have
-            for they_want in owner_of_wanted.plots_wanted[::-1]:
+            for they_want in reversed(owner_of_wanted.plots_wanted):
                 if (
                     they_want in self.plots_offered
                     and board.b[i_want].group != board.b[they_want].group
                 ):  # prevent exchanging in groups of 2
-                    log.write(
-                        "Trade match: "
-                        + self.name
-                        + " wants "
-                        + board.b[i_want].name
-                        + ", and "
-                        + owner_of_wanted.name
-                        + " wants "
-                        + board.b[they_want].name,
-                        3,
-                    )
+                    if LOG_ENABLED:
+                        log.write(
+                            f"Trade match: {self.name} wants {board.b[i_want].name}, "
+                            f"and {owner_of_wanted.name} wants "
+                            f"{board.b[they_want].name}",
+                            3,
+                        )
 
                     # Compensate that one plot is cheaper than another one
                     if board.b[i_want].cost_base < board.b[they_want].cost_base:
@@ -437,21 +569,26 @@ class Player:
                         board.b[expensive_one].cost_base
                         - board.b[cheaper_one].cost_base
                     )
-                    log.write("Price difference is $" + str(price_diff), 3)
+                    if LOG_ENABLED:
+                        log.write(f"Price difference is ${price_diff}", 3)
 
                     # make sure they they can pay the money
                     if (
                         board.b[cheaper_one].owner.money - price_diff
                         >= board.b[cheaper_one].owner.cash_limit
                     ):
-                        log.write("We have a deal. Money and property changed hands", 3)
+                        if LOG_ENABLED:
+                            log.write(
+                                "We have a deal. Money and property changed hands", 3
+                            )
                         # Money and property change hands
                         board.b[cheaper_one].owner.take_money(price_diff)
                         board.b[expensive_one].owner.add_money(price_diff)
-                        board.b[cheaper_one].owner, board.b[expensive_one].owner = (
-                            board.b[expensive_one].owner,
-                            board.b[cheaper_one].owner,
+                        cheaper_owner = board.b[cheaper_one].owner
+                        board.set_owner(
+                            board.b[cheaper_one], board.b[expensive_one].owner
                         )
+                        board.set_owner(board.b[expensive_one], cheaper_owner)
                         trade_happened = True
 
                         # recalculated wanted and offered plots
@@ -460,25 +597,26 @@ class Player:
 
     def three_way_trade(self, board):
         """Look for and perform a three-way trade"""
+        if not self.plots_wanted or not self.plots_offered:
+            return
         trade_happened = False
-        for wanted1 in self.plots_wanted[::-1]:
+        for wanted1 in reversed(self.plots_wanted):
             owner_of_wanted1 = board.b[wanted1].owner
             if owner_of_wanted1 is None:
                 continue
-            for wanted2 in owner_of_wanted1.plots_wanted[::-1]:
+            for wanted2 in reversed(owner_of_wanted1.plots_wanted):
                 owner_of_wanted2 = board.b[wanted2].owner
                 if owner_of_wanted2 is None:
                     continue
-                for wanted3 in owner_of_wanted2.plots_wanted[::-1]:
+                for wanted3 in reversed(owner_of_wanted2.plots_wanted):
                     if wanted3 in self.plots_offered:
 
                         # check we have property from 3 groups
                         # otherwise someone can give and take brown or indigo at the same time
-                        check_diff_group = set()
-                        check_diff_group.add(board.b[wanted1].group)
-                        check_diff_group.add(board.b[wanted2].group)
-                        check_diff_group.add(board.b[wanted3].group)
-                        if len(check_diff_group) < 3:
+                        group1 = board.b[wanted1].group
+                        group2 = board.b[wanted2].group
+                        group3 = board.b[wanted3].group
+                        if group1 == group2 or group2 == group3 or group1 == group3:
                             continue
 
                         topay1 = board.b[wanted1].cost_base - board.b[wanted3].cost_base
@@ -491,41 +629,29 @@ class Player:
                             and owner_of_wanted2.money - topay3
                             > owner_of_wanted2.cash_limit
                         ):
-                            log.write("Tree way trade: ", 3)
-                            log.write(
-                                self.name
-                                + " gives "
-                                + board.b[wanted3].name
-                                + " and $"
-                                + str(topay1)
-                                + " for "
-                                + board.b[wanted1].name,
-                                4,
-                            )
-                            log.write(
-                                owner_of_wanted1.name
-                                + " gives "
-                                + board.b[wanted1].name
-                                + " and $"
-                                + str(topay2)
-                                + " for "
-                                + board.b[wanted2].name,
-                                4,
-                            )
-                            log.write(
-                                owner_of_wanted2.name
-                                + " gives "
-                                + board.b[wanted2].name
-                                + " and $"
-                                + str(topay3)
-                                + " for "
-                                + board.b[wanted3].name,
-                                4,
-                            )
+                            if LOG_ENABLED:
+                                log.write("Tree way trade: ", 3)
+                                log.write(
+                                    f"{self.name} gives {board.b[wanted3].name} and "
+                                    f"${topay1} for {board.b[wanted1].name}",
+                                    4,
+                                )
+                                log.write(
+                                    f"{owner_of_wanted1.name} gives "
+                                    f"{board.b[wanted1].name} and ${topay2} for "
+                                    f"{board.b[wanted2].name}",
+                                    4,
+                                )
+                                log.write(
+                                    f"{owner_of_wanted2.name} gives "
+                                    f"{board.b[wanted2].name} and ${topay3} for "
+                                    f"{board.b[wanted3].name}",
+                                    4,
+                                )
                             # Money and property change hands
-                            board.b[wanted1].owner = self
-                            board.b[wanted2].owner = owner_of_wanted1
-                            board.b[wanted3].owner = owner_of_wanted2
+                            board.set_owner(board.b[wanted1], self)
+                            board.set_owner(board.b[wanted2], owner_of_wanted1)
+                            board.set_owner(board.b[wanted3], owner_of_wanted2)
                             self.take_money(topay1)
                             owner_of_wanted1.take_money(topay2)
                             owner_of_wanted2.take_money(topay3)
@@ -534,9 +660,20 @@ class Player:
                             board.recalculate_after_property_change()
 
 
+# Kinds of cells, to tell them apart without type() checks
+KIND_CELL = 0
+KIND_PROPERTY = 1
+KIND_CHANCE = 2
+KIND_COMMUNITY = 3
+KIND_PROPERTY_TAX = 4
+
+
 class Cell:
     """Generic Cell Class, base for other classes"""
 
+    __slots__ = ("name", "group")
+    kind = KIND_CELL
+
     def __init__(self, name):
         self.name = name
         self.group = ""
@@ -548,309 +685,358 @@ class Cell:
 class LuxuryTax(Cell):
     """Pay Luxury Tax cell (#38)"""
 
+    __slots__ = ()
+
     def action(self, player):
         player.take_money(settingsLuxuryTax)
-        log.write(player.name + " pays Luxury Tax $" + str(settingsLuxuryTax), 3)
+        if LOG_ENABLED:
+            log.write(f"{player.name} pays Luxury Tax ${settingsLuxuryTax}", 3)
 
 
 class PropertyTax(Cell):
     """Pay Property Tax cell (200 or 10%) (#4)"""
 
+    __slots__ = ()
+    kind = KIND_PROPERTY_TAX
+
     def action(self, player, board):
         to_pay = min(settingsPropertyTax, player.net_worth(board) // 10)
-        log.write(player.name + " pays Property Tax $" + str(to_pay), 3)
+        if LOG_ENABLED:
+            log.write(f"{player.name} pays Property Tax ${to_pay}", 3)
         player.take_money(to_pay)
 
 
 class GoToJail(Cell):
     """Go to Jail (#30)"""
 
+    __slots__ = ()
+
     def action(self, player):
         player.move_to(10)
         player.in_jail = True
-        log.write(player.name + " goes to jail from Go To Jail ", 3)
+        if LOG_ENABLED:
+            log.write(f"{player.name} goes to jail from Go To Jail ", 3)
+
+
+# Nearest railroad and utility ahead of each cell, for the Chance cards
+NEXT_RAIL = tuple(((p + 4) // 10 * 10 + 5) % 40 for p in range(40))
+NEXT_UTIL = tuple(28 if 12 < p <= 28 else 12 for p in range(40))
+
+
+# Chance cards actions, indexed by the card number
+
+
+# 0: Advance to St.Charles
+def _chance_advance_to_st_charles(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets chance card: Advance to St.Charles", 3)
+    if player.position >= 11:
+        player.add_money(settingsSalary)
+        if LOG_ENABLED:
+            log.write(f"{player.name} gets salary: ${settingsSalary}", 3)
+    player.position = 11
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to {board.b[11].name}", 3)
+    board.action(player, player.position)
+
+
+# 1: Get Out Of Jail Free
+def _chance_get_out_of_jail_free(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets chance card: Get Out Of Jail Free", 3)
+    player.has_jail_card_chance = True
+
+
+# 2: Take a ride on the Reading
+def _chance_ride_on_the_reading(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets chance card: Take a ride on the Reading", 3)
+    if player.position >= 5:
+        player.add_money(settingsSalary)
+        if LOG_ENABLED:
+            log.write(f"{player.name} gets salary: ${settingsSalary}", 3)
+    player.position = 5
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to {board.b[player.position].name}", 3)
+    board.action(player, player.position)
+
+
+# 3: Move to the nearest railroad and pay double
+def _chance_nearest_railroad(player, board):
+    if LOG_ENABLED:
+        log.write(
+            f"{player.name} gets chance card: "
+            "Move to the nearest railroad and pay double",
+            3,
+        )
+    # Don't get salary, even if you pass GO (card doesnt say to do it)
+    # Dont move is already on a rail.
+    # Also, I assume advance means you should go to the nearest in front of you, not behind
+    player.position = NEXT_RAIL[player.position]
+    # twice for double rent, if needed
+    board.action(player, player.position, special="from_chance")
+
+
+# 4: Advance to Illinois Avenue
+def _chance_advance_to_illinois(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets chance card: Advance to Illinois Avenue", 3)
+    if player.position >= 24:
+        player.add_money(settingsSalary)
+        if LOG_ENABLED:
+            log.write(f"{player.name} gets salary: ${settingsSalary}", 3)
+    player.position = 24
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to {board.b[player.position].name}", 3)
+    board.action(player, player.position)
+
+
+# 5: Make general repairs to your property
+def _chance_general_repairs(player, board):
+    if LOG_ENABLED:
+        log.write(
+            f"{player.name} gets chance card: Make general repairs to your property", 3
+        )
+    player.make_repairs(board, "chance")
+
+
+# 6: Advance to GO
+def _chance_advance_to_go(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets chance card: Advance to GO", 3)
+    player.add_money(settingsSalary)
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets salary: ${settingsSalary}", 3)
+    player.position = 0
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to {board.b[player.position].name}", 3)
+
+
+# 9: Advance to the nearest Utility and pay 10x dice
+def _chance_nearest_utility(player, board):
+    if LOG_ENABLED:
+        log.write(
+            f"{player.name} gets chance card: "
+            "Advance to the nearest Utility and pay 10x dice",
+            3,
+        )
+    player.position = NEXT_UTIL[player.position]
+    board.action(player, player.position, special="from_chance")
+
+
+# 10: Go Directly to Jail
+def _chance_go_to_jail(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets chance card: Go Directly to Jail", 3)
+    player.move_to(10)
+    player.in_jail = True
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to jail on Chance card", 3)
+
+
+# 11: You've been elected chairman. Pay each player $50
+def _chance_elected_chairman(player, board):
+    if LOG_ENABLED:
+        log.write(
+            f"{player.name} gets chance card: "
+            "You've been elected chairman. Pay each player $50",
+            3,
+        )
+    for other_player in board.players:
+        if other_player != player and not other_player.is_bankrupt:
+            player.take_money(50)
+            other_player.add_money(50)
+
+
+# 12: Advance to BoardWalk
+def _chance_advance_to_boardwalk(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets chance card: Advance to BoardWalk", 3)
+    player.position = 39
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to {board.b[player.position].name}", 3)
+    board.action(player, player.position)
+
+
+# 13: Go back 3 spaces
+def _chance_go_back_three(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets chance card: Go back 3 spaces", 3)
+    player.position -= 3
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to {board.b[player.position].name}", 3)
+    board.action(player, player.position)
+
+
+# Chance cards that only pay or take money: card number -> (text, money)
+_CHANCE_MONEY = {
+    7: ("Bank pays you dividend $50", 50),
+    8: ("Pay poor tax $15", -15),
+    14: ("Your building loan matures. Receive $150", 150),
+    15: ("You have won a crossword competition. Collect $100", 100),
+}
+
+# the rest of the Chance cards: card number -> action
+_CHANCE_HANDLERS = {
+    0: _chance_advance_to_st_charles,
+    1: _chance_get_out_of_jail_free,
+    2: _chance_ride_on_the_reading,
+    3: _chance_nearest_railroad,
+    4: _chance_advance_to_illinois,
+    5: _chance_general_repairs,
+    6: _chance_advance_to_go,
+    9: _chance_nearest_utility,
+    10: _chance_go_to_jail,
+    11: _chance_elected_chairman,
+    12: _chance_advance_to_boardwalk,
+    13: _chance_go_back_three,
+}
 
 
 class Chance(Cell):
     """Chance cards"""
 
+    __slots__ = ()
+    kind = KIND_CHANCE
+
     def action(self, player, board):
 
         # Get the card
-        chance_card = board.chanceCards.pop(0)
-
-        # Actions for various cards
-
-        # 0: Advance to St.Charles
-        if chance_card == 0:
-            log.write(player.name + " gets chance card: Advance to St.Charles", 3)
-            if player.position >= 11:
-                player.add_money(settingsSalary)
-                log.write(player.name + " gets salary: $" + str(settingsSalary), 3)
-            player.position = 11
-            log.write(player.name + " goes to " + str(board.b[11].name), 3)
-            board.action(player, player.position)
-
-        # 1: Get Out Of Jail Free
-        elif chance_card == 1:
-            log.write(player.name + " gets chance card: Get Out Of Jail Free", 3)
-            player.has_jail_card_chance = True
-
-        # 2: Take a ride on the Reading
-        elif chance_card == 2:
-            log.write(player.name + " gets chance card: Take a ride on the Reading", 3)
-            if player.position >= 5:
-                player.add_money(settingsSalary)
-                log.write(player.name + " gets salary: $" + str(settingsSalary), 3)
-            player.position = 5
-            log.write(player.name + " goes to " + str(board.b[player.position].name), 3)
-            board.action(player, player.position)
-
-        # 3: Move to the nearest railroad and pay double
-        elif chance_card == 3:
-            log.write(
-                player.name
-                + " gets chance card: Move to the nearest railroad and pay double",
-                3,
-            )
-            # Don't get salary, even if you pass GO (card doesnt say to do it)
-            # Dont move is already on a rail.
-            # Also, I assume advance means you should go to the nearest in front of you, not behind
-            player.position = (
-                (player.position + 4) // 10 * 10 + 5
-            ) % 40  # nearest railroad
-            # twice for double rent, if needed
-            board.action(player, player.position, special="from_chance")
-
-        # 4: Advance to Illinois Avenue
-        elif chance_card == 4:
-            log.write(player.name + " gets chance card: Advance to Illinois Avenue", 3)
-            if player.position >= 24:
-                player.add_money(settingsSalary)
-                log.write(player.name + " gets salary: $" + str(settingsSalary), 3)
-            player.position = 24
-            log.write(player.name + " goes to " + str(board.b[player.position].name), 3)
-            board.action(player, player.position)
-
-        # 5: Make general repairs to your property
-        elif chance_card == 5:
-            log.write(
-                player.name
-                + " gets chance card: Make general repairs to your property",
-                3,
-            )
-            player.make_repairs(board, "chance")
-
-        # 6: Advance to GO
-        elif chance_card == 6:
-            log.write(player.name + " gets chance card: Advance to GO", 3)
-            player.add_money(settingsSalary)
-            log.write(player.name + " gets salary: $" + str(settingsSalary), 3)
-            player.position = 0
-            log.write(player.name + " goes to " + str(board.b[player.position].name), 3)
-
-        # 7: Bank pays you dividend $50
-        elif chance_card == 7:
-            log.write(player.name + " gets chance card: Bank pays you dividend $50", 3)
+        chance_card = board.chanceCards.draw()
+
+        # Action for the card
+        money_card = _CHANCE_MONEY.get(chance_card)
+        if money_card is None:
+            _CHANCE_HANDLERS[chance_card](player, board)
+        else:
+            text, money = money_card
+            if LOG_ENABLED:
+                log.write(f"{player.name} gets chance card: {text}", 3)
+            player.add_money(money)
+
+        # Put the card back
+        if chance_card != 1:  # except GOOJF card
+            board.chanceCards.put(chance_card)
+
+
+# Community Chest cards actions, indexed by the card number
+
+
+# 1: Opera night: collect $50 from each player
+def _community_opera_night(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} Opera night: collect $50 from each player", 3)
+    for other_player in board.players:
+        if other_player != player and not other_player.is_bankrupt:
             player.add_money(50)
+            other_player.take_money(50)
+            other_player.check_bankruptcy(board)
 
-        # 8: Pay poor tax $15
-        elif chance_card == 8:
-            log.write(player.name + " gets chance card: Pay poor tax $15", 3)
-            player.take_money(15)
 
-        # 9: Advance to the nearest Utility and pay 10x dice
-        elif chance_card == 9:
-            log.write(
-                player.name
-                + " gets chance card: Advance to the nearest Utility and pay 10x dice",
-                3,
-            )
-            if 12 < player.position <= 28:
-                player.position = 28
-            else:
-                player.position = 12
-            board.action(player, player.position, special="from_chance")
-
-        # 10: Go Directly to Jail
-        elif chance_card == 10:
-            log.write(player.name + " gets chance card: Go Directly to Jail", 3)
-            player.move_to(10)
-            player.in_jail = True
-            log.write(player.name + " goes to jail on Chance card", 3)
-
-        # 11: You've been elected chairman. Pay each player $50
-        elif chance_card == 11:
-            log.write(
-                player.name
-                + " gets chance card: You've been elected chairman. Pay each player $50",
-                3,
-            )
-            for other_player in board.players:
-                if other_player != player and not other_player.is_bankrupt:
-                    player.take_money(50)
-                    other_player.add_money(50)
-
-        # 12: Advance to BoardWalk
-        elif chance_card == 12:
-            log.write(player.name + " gets chance card: Advance to BoardWalk", 3)
-            player.position = 39
-            log.write(player.name + " goes to " + str(board.b[player.position].name), 3)
-            board.action(player, player.position)
-
-        # 13: Go back 3 spaces
-        elif chance_card == 13:
-            log.write(player.name + " gets chance card: Go back 3 spaces", 3)
-            player.position -= 3
-            log.write(player.name + " goes to " + str(board.b[player.position].name), 3)
-            board.action(player, player.position)
-
-        # 14: Your building loan matures. Receive $150.
-        elif chance_card == 14:
-            log.write(
-                player.name
-                + " gets chance card: Your building loan matures. Receive $150",
-                3,
-            )
-            player.add_money(150)
+# 5: Go Directly to Jail
+def _community_go_to_jail(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets community card: Go Directly to Jail", 3)
+    player.move_to(10)
+    player.in_jail = True
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to jail on Community card", 3)
 
-        # 15: You have won a crossword competition. Collect $100
-        elif chance_card == 15:
-            log.write(
-                player.name
-                + " gets chance card: You have won a crossword competition. Collect $100",
-                3,
-            )
-            player.add_money(100)
 
-        # Put the card back
-        if chance_card != 1:  # except GOOJF card
-            board.chanceCards.append(chance_card)
+# 6: Get Out Of Jail Free
+def _community_get_out_of_jail_free(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets community card: Get Out Of Jail Free", 3)
+    player.has_jail_card_community = True
+
+
+# 8: You are assigned for street repairs
+def _community_street_repairs(player, board):
+    if LOG_ENABLED:
+        log.write(
+            f"{player.name} gets community card: You are assigned for street repairs", 3
+        )
+    player.make_repairs(board, "community")
+
+
+# 10: Advance to GO
+def _community_advance_to_go(player, board):
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets community card: Advance to GO", 3)
+    player.add_money(settingsSalary)
+    if LOG_ENABLED:
+        log.write(f"{player.name} gets salary: ${settingsSalary}", 3)
+    player.position = 0
+    if LOG_ENABLED:
+        log.write(f"{player.name} goes to {board.b[player.position].name}", 3)
+
+
+# Community Chest cards that only pay or take money: card number -> (text, money)
+_COMMUNITY_MONEY = {
+    0: ("Pay school tax $150", -150),
+    2: ("You inherit $100", 100),
+    3: ("Pay hospital $100", -100),
+    4: ("Income tax refund $20", 20),
+    7: ("Second prize in beauty contest $10", 10),
+    9: ("Bank error in your favour: $200", 200),
+    11: ("X-Mas fund matured: $100", 100),
+    12: ("Doctor's fee $50", -50),
+    13: ("From sale of stock you get $45", 45),
+    14: ("Receive for services $25", 25),
+    15: ("Life insurance matures, collect $100", 100),
+}
+
+# the rest of the Community Chest cards: card number -> action
+_COMMUNITY_HANDLERS = {
+    1: _community_opera_night,
+    5: _community_go_to_jail,
+    6: _community_get_out_of_jail_free,
+    8: _community_street_repairs,
+    10: _community_advance_to_go,
+}
 
 
 class Community(Cell):
     """Community Chest cards"""
 
+    __slots__ = ()
+    kind = KIND_COMMUNITY
+
     def action(self, player, board):
 
         # Get the card
-        community_card = board.communityCards.pop(0)
-
-        # Actions for various cards
-
-        # 0: Pay school tax $150
-        if community_card == 0:
-            log.write(player.name + " gets community card: Pay school tax $150", 3)
-            player.take_money(150)
-
-        # 1: Opera night: collect $50 from each player
-        if community_card == 1:
-            log.write(player.name + " Opera night: collect $50 from each player", 3)
-            for other_player in board.players:
-                if other_player != player and not other_player.is_bankrupt:
-                    player.add_money(50)
-                    other_player.take_money(50)
-                    other_player.check_bankruptcy(board)
-
-        # 2: You inherit $100
-        if community_card == 2:
-            log.write(player.name + " gets community card: You inherit $100", 3)
-            player.add_money(100)
-
-        # 3: Pay hospital $100
-        if community_card == 3:
-            log.write(player.name + " gets community card: Pay hospital $100", 3)
-            player.take_money(100)
-
-        # 4: Income tax refund $20
-        if community_card == 4:
-            log.write(player.name + " gets community card: Income tax refund $20", 3)
-            player.add_money(20)
-
-        # 5: Go Directly to Jail
-        elif community_card == 5:
-            log.write(player.name + " gets community card: Go Directly to Jail", 3)
-            player.move_to(10)
-            player.in_jail = True
-            log.write(player.name + " goes to jail on Community card", 3)
-
-        # 6: Get Out Of Jail Free
-        elif community_card == 6:
-            log.write(player.name + " gets community card: Get Out Of Jail Free", 3)
-            player.has_jail_card_community = True
-
-        # 7: Second prize in beauty contest $10
-        if community_card == 7:
-            log.write(
-                player.name
-                + " gets community card: Second prize in beauty contest $10",
-                3,
-            )
-            player.add_money(10)
-
-        # 8: You are assigned for street repairs
-        elif community_card == 8:
-            log.write(
-                player.name
-                + " gets community card: You are assigned for street repairs",
-                3,
-            )
-            player.make_repairs(board, "community")
-
-        # 9: Bank error in your favour: $200
-        if community_card == 9:
-            log.write(
-                player.name + " gets community card: Bank error in your favour: $200", 3
-            )
-            player.add_money(200)
-
-        # 10: Advance to GO
-        elif community_card == 10:
-            log.write(player.name + " gets community card: Advance to GO", 3)
-            player.add_money(settingsSalary)
-            log.write(player.name + " gets salary: $" + str(settingsSalary), 3)
-            player.position = 0
-            log.write(player.name + " goes to " + str(board.b[player.position].name), 3)
-
-        # 11: X-Mas fund matured: $100
-        if community_card == 11:
-            log.write(player.name + " gets community card: X-Mas fund matured: $100", 3)
-            player.add_money(100)
-
-        # 12: Doctor's fee $50
-        if community_card == 12:
-            log.write(player.name + " gets community card: Doctor's fee $50", 3)
-            player.take_money(50)
+        community_card = board.communityCards.draw()
 
-        # 13: From sale of stock you get $45
-        if community_card == 13:
-            log.write(
-                player.name + " gets community card: From sale of stock you get $45", 3
-            )
-            player.add_money(45)
-
-        # 14: Receive for services $25
-        if community_card == 14:
-            log.write(player.name + " gets community card: Receive for services $25", 3)
-            player.add_money(25)
-
-        # 15: Life insurance matures, collect $100
-        if community_card == 15:
-            log.write(
-                player.name
-                + " gets community card: Life insurance matures, collect $100",
-                3,
-            )
-            player.add_money(100)
+        # Action for the card
+        money_card = _COMMUNITY_MONEY.get(community_card)
+        if money_card is None:
+            _COMMUNITY_HANDLERS[community_card](player, board)
+        else:
+            text, money = money_card
+            if LOG_ENABLED:
+                log.write(f"{player.name} gets community card: {text}", 3)
+            player.add_money(money)
 
         # Put the card back
         if community_card != 6:  # except GOOJF card
-            board.communityCards.append(community_card)
+            board.communityCards.put(community_card)
 
 
 class Property(Cell):
     """Property Class (for Properties, Rails, Utilities)"""
 
+    __slots__ = (
+        "cost_base",
+        "rent_base",
+        "cost_house",
+        "rent_house",
+        "owner",
+        "is_mortgaged",
+        "is_monopoly",
+        "hasHouses",
+    )
+    kind = KIND_PROPERTY
+
     def __init__(self, name, cost_base, rent_base, cost_house, rent_house, group):
         Cell.__init__(self, name)
         self.cost_base = cost_base
@@ -868,26 +1054,26 @@ class Property(Cell):
 
         # it's their property or mortgaged - do nothing
         if self.owner == player or self.is_mortgaged:
-            log.write("No rent this time", 3)
+            if LOG_ENABLED:
+                log.write("No rent this time", 3)
             return
 
         # Property up for sale
         elif self.owner is None:
             if player.wants_to_buy(self.cost_base, self.group):
-                log.write(
-                    player.name
-                    + " buys property "
-                    + self.name
-                    + " for $"
-                    + str(self.cost_base),
-                    3,
-                )
+                if LOG_ENABLED:
+                    log.write(
+                        f"{player.name} buys property {self.name} "
+                        f"for ${self.cost_base}",
+                        3,
+                    )
                 player.take_money(self.cost_base)
-                self.owner = player
+                board.set_owner(self, player)
                 board.recalculate_after_property_change()
             else:
                 pass  # auction here
-                log.write(player.name + " didn't buy the property.", 3)
+                if LOG_ENABLED:
+                    log.write(f"{player.name} didn't buy the property.", 3)
                 # Auction here
                 # Decided not to implement it...
             return
@@ -896,300 +1082,281 @@ class Property(Cell):
         else:
             player.take_money(rent)
             self.owner.add_money(rent)
-            log.write(
-                player.name + " pays the rent $" + str(rent) + " to " + self.owner.name,
-                3,
-            )
+            if LOG_ENABLED:
+                log.write(
+                    f"{player.name} pays the rent ${rent} to {self.owner.name}", 3
+                )
 
     # mortgage the plot to the player / or sell the house
-    def mortgage(self, player, board):
+    # (index is the position of the plot on the board)
+    def mortgage(self, player, board, index):
         """Sell hotel"""
         if self.hasHouses == 5:
             player.add_money(self.cost_house * 5 // 2)
             self.hasHouses = 0
             board.nHotels -= 1
-            log.write(player.name + " sells hotel on " + self.name, 3)
+            if LOG_ENABLED:
+                log.write(f"{player.name} sells hotel on {self.name}", 3)
         # Sell one house
         elif self.hasHouses > 0:
             player.add_money(self.cost_house // 2)
             self.hasHouses -= 1
             board.nHouses -= 1
-            log.write(player.name + " sells house on " + self.name, 3)
+            if LOG_ENABLED:
+                log.write(f"{player.name} sells house on {self.name}", 3)
         # Mortgage
         else:
             self.is_mortgaged = True
             player.add_money(self.cost_base // 2)
-            # log name of the plot and money player need to pay to get it back
-            player.has_mortgages.append((self, int((self.cost_base // 2) * 1.1)))
-            log.write(player.name + " mortgages " + self.name, 3)
+            # log money player need to pay to get it back and where the plot is
+            heapq.heappush(player.has_mortgages, (self.cost_base * 11 // 20, index))
+            if LOG_ENABLED:
+                log.write(f"{player.name} mortgages {self.name}", 3)
+        board.mark_dirty(self)
 
     # unmortgage thr plot
 
-    def unmortgage(self, player):
-        # print (player.hasMortgages)
-        for mortgage in player.has_mortgages:
-            if mortgage[0] == self:
-                this_mortgage = mortgage
+    def unmortgage(self, player, cost):
         self.is_mortgaged = False
-        player.take_money(this_mortgage[1])
-        player.has_mortgages.remove(this_mortgage)
-        log.write(player.name + " unmortgages " + self.name, 3)
+        player.take_money(cost)
+        if LOG_ENABLED:
+            log.write(f"{player.name} unmortgages {self.name}", 3)
+
+
+# Cells of the board in order: cell class and its arguments
+#
+# name: does not really matter, just convenience
+# base_cost: used when buying plot, mortgage
+# base_rent: used for rent and monopoly rent
+#  (for utilities and rail - in calculate_rent method)
+# house_cost: price of one house (or a hotel)
+# house_rent: list of rent price with 1,2,3,4 houses and a hotel
+# group: used to determine monopoly
+BOARD_CELLS = (
+    # 0-4
+    (Cell, "Go"),
+    (Property, "A1 Mediterraneal Avenue", 60, 2, 50, (10, 30, 90, 160, 250), "brown"),
+    (Community, "Community Chest"),
+    (Property, "A2 Baltic Avenue", 60, 4, 50, (20, 60, 180, 320, 450), "brown"),
+    (PropertyTax, "Property Tax"),
+    # 5-9
+    (Property, "R1 Reading railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail"),
+    (Property, "B1 Oriental Avenue", 100, 6, 50, (30, 90, 270, 400, 550), "lightblue"),
+    (Chance, "Chance"),
+    (Property, "B2 Vermont Avenue", 100, 6, 50, (30, 90, 270, 400, 550), "lightblue"),
+    (
+        Property,
+        "B3 Connecticut Avenue",
+        120,
+        8,
+        50,
+        (40, 100, 300, 450, 600),
+        "lightblue",
+    ),
+    # 10-14
+    (Cell, "Prison"),
+    (Property, "C1 St.Charles Place", 140, 10, 100, (50, 150, 450, 625, 750), "pink"),
+    (Property, "U1 Electric Company", 150, 0, 0, (0, 0, 0, 0, 0), "util"),
+    (Property, "C2 States Avenue", 140, 10, 100, (50, 150, 450, 625, 750), "pink"),
+    (Property, "C3 Virginia Avenue", 160, 12, 100, (60, 180, 500, 700, 900), "pink"),
+    # 15-19
+    (Property, "R2 Pennsylvania Railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail"),
+    (Property, "D1 St.James Place", 180, 14, 100, (70, 200, 550, 700, 950), "orange"),
+    (Community, "Community Chest"),
+    (Property, "D2 Tennessee Avenue", 180, 14, 100, (70, 200, 550, 700, 950), "orange"),
+    (Property, "D3 New York Avenue", 200, 16, 100, (80, 220, 600, 800, 1000), "orange"),
+    # 20-24
+    (Cell, "Free Parking"),
+    (Property, "E1 Kentucky Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), "red"),
+    (Chance, "Chance"),
+    (Property, "E2 Indiana Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), "red"),
+    (Property, "E3 Illinois Avenue", 240, 20, 150, (100, 300, 750, 925, 1100), "red"),
+    # 25-29
+    (Property, "R3 BnO Railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail"),
+    (
+        Property,
+        "F1 Atlantic Avenue",
+        260,
+        22,
+        150,
+        (110, 330, 800, 975, 1150),
+        "yellow",
+    ),
+    (
+        Property,
+        "F2 Ventinor Avenue",
+        260,
+        22,
+        150,
+        (110, 330, 800, 975, 1150),
+        "yellow",
+    ),
+    (Property, "U2 Waterworks", 150, 0, 0, (0, 0, 0, 0, 0), "util"),
+    (
+        Property,
+        "F3 Martin Gardens",
+        280,
+        24,
+        150,
+        (120, 360, 850, 1025, 1200),
+        "yellow",
+    ),
+    # 30-34
+    (GoToJail, "Go To Jail"),
+    (Property, "G1 Pacific Avenue", 300, 26, 200, (130, 390, 900, 1100, 1275), "green"),
+    (
+        Property,
+        "G2 North Carolina Avenue",
+        300,
+        26,
+        200,
+        (130, 390, 900, 1100, 1275),
+        "green",
+    ),
+    (Community, "Community Chest"),
+    (
+        Property,
+        "G3 Pennsylvania Avenue",
+        320,
+        28,
+        200,
+        (150, 450, 100, 1200, 1400),
+        "green",
+    ),
+    # 35-39
+    (Property, "R4 Short Line", 200, 0, 0, (0, 0, 0, 0, 0), "rail"),
+    (Chance, "Chance"),
+    (Property, "H1 Park Place", 350, 35, 200, (175, 500, 1100, 1300, 1500), "indigo"),
+    (LuxuryTax, "Luxury Tax"),
+    (Property, "H2 Boardwalk", 400, 50, 200, (200, 600, 1400, 1700, 2000), "indigo"),
+)
 
 
 class Board:
+    __slots__ = (
+        "players",
+        "b",
+        "ownable",
+        "property_indices",
+        "group_indices",
+        "nHouses",
+        "nHotels",
+        "dirty_groups",
+        "dirty_players",
+        "alive",
+        "version",
+        "chanceCards",
+        "communityCards",
+        "dice_pool",
+    )
+
     def __init__(self, players):
-        """
-        Board is a data for plots
-
-        name: does not really matter, just convenience
-        base_cost: used when buying plot, mortgage
-        base_rent: used for rent and monopoly rent
-         (for utilities and rail - in calculateRent method)
-        house_cost: price of one house (or a hotel)
-        house_rent: list of rent price with 1,2,3,4 houses and a hotel
-        group: used to determine monopoly
-        """
+        """Board is a data for plots, built from BOARD_CELLS"""
 
         # I know it is messy, but I need this for players to pay each other
         self.players = players
 
-        self.b = []
-        # 0-4
-        self.b.append(Cell("Go"))
-        self.b.append(
-            Property(
-                "A1 Mediterraneal Avenue", 60, 2, 50, (10, 30, 90, 160, 250), "brown"
-            )
-        )
-        self.b.append(Community("Community Chest"))
-        self.b.append(
-            Property("A2 Baltic Avenue", 60, 4, 50, (20, 60, 180, 320, 450), "brown")
-        )
-        self.b.append(PropertyTax("Property Tax"))
-        # 5-9
-        self.b.append(
-            Property("R1 Reading railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail")
-        )
-        self.b.append(
-            Property(
-                "B1 Oriental Avenue", 100, 6, 50, (30, 90, 270, 400, 550), "lightblue"
-            )
-        )
-        self.b.append(Chance("Chance"))
-        self.b.append(
-            Property(
-                "B2 Vermont Avenue", 100, 6, 50, (30, 90, 270, 400, 550), "lightblue"
-            )
-        )
-        self.b.append(
-            Property(
-                "B3 Connecticut Avenue",
-                120,
-                8,
-                50,
-                (40, 100, 300, 450, 600),
-                "lightblue",
-            )
-        )
-        # 10-14
-        self.b.append(Cell("Prison"))
-        self.b.append(
-            Property(
-                "C1 St.Charles Place", 140, 10, 100, (50, 150, 450, 625, 750), "pink"
-            )
-        )
-        self.b.append(
-            Property("U1 Electric Company", 150, 0, 0, (0, 0, 0, 0, 0), "util")
-        )
-        self.b.append(
-            Property("C2 States Avenue", 140, 10, 100, (50, 150, 450, 625, 750), "pink")
-        )
-        self.b.append(
-            Property(
-                "C3 Virginia Avenue", 160, 12, 100, (60, 180, 500, 700, 900), "pink"
-            )
-        )
-        # 15-19
-        self.b.append(
-            Property("R2 Pennsylvania Railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail")
-        )
-        self.b.append(
-            Property(
-                "D1 St.James Place", 180, 14, 100, (70, 200, 550, 700, 950), "orange"
-            )
-        )
-        self.b.append(Community("Community Chest"))
-        self.b.append(
-            Property(
-                "D2 Tennessee Avenue", 180, 14, 100, (70, 200, 550, 700, 950), "orange"
-            )
-        )
-        self.b.append(
-            Property(
-                "D3 New York Avenue", 200, 16, 100, (80, 220, 600, 800, 1000), "orange"
-            )
-        )
-        # 20-24
-        self.b.append(Cell("Free Parking"))
-        self.b.append(
-            Property(
-                "E1 Kentucky Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), "red"
-            )
-        )
-        self.b.append(Chance("Chance"))
-        self.b.append(
-            Property(
-                "E2 Indiana Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), "red"
-            )
-        )
-        self.b.append(
-            Property(
-                "E3 Illinois Avenue", 240, 20, 150, (100, 300, 750, 925, 1100), "red"
-            )
-        )
-        # 25-29
-        self.b.append(Property("R3 BnO Railroad", 200, 0, 0, (0, 0, 0, 0, 0), "rail"))
-        self.b.append(
-            Property(
-                "F1 Atlantic Avenue", 260, 22, 150, (110, 330, 800, 975, 1150), "yellow"
-            )
-        )
-        self.b.append(
-            Property(
-                "F2 Ventinor Avenue", 260, 22, 150, (110, 330, 800, 975, 1150), "yellow"
-            )
-        )
-        self.b.append(Property("U2 Waterworks", 150, 0, 0, (0, 0, 0, 0, 0), "util"))
-        self.b.append(
-            Property(
-                "F3 Martin Gardens", 280, 24, 150, (120, 360, 850, 1025, 1200), "yellow"
-            )
-        )
-        # 30-34
-        self.b.append(GoToJail("Go To Jail"))
-        self.b.append(
-            Property(
-                "G1 Pacific Avenue", 300, 26, 200, (130, 390, 900, 1100, 1275), "green"
-            )
-        )
-        self.b.append(
-            Property(
-                "G2 North Carolina Avenue",
-                300,
-                26,
-                200,
-                (130, 390, 900, 1100, 1275),
-                "green",
-            )
-        )
-        self.b.append(Community("Community Chest"))
-        self.b.append(
-            Property(
-                "G3 Pennsylvania Avenue",
-                320,
-                28,
-                200,
-                (150, 450, 100, 1200, 1400),
-                "green",
-            )
-        )
-        # 35-39
-        self.b.append(Property("R4 Short Line", 200, 0, 0, (0, 0, 0, 0, 0), "rail"))
-        self.b.append(Chance("Chance"))
-        self.b.append(
-            Property(
-                "H1 Park Place", 350, 35, 200, (175, 500, 1100, 1300, 1500), "indigo"
-            )
-        )
-        self.b.append(LuxuryTax("Luxury Tax"))
-        self.b.append(
-            Property(
-                "H2 Boardwalk", 400, 50, 200, (200, 600, 1400, 1700, 2000), "indigo"
-            )
-        )
+        self.b = [cell_class(*args) for cell_class, *args in BOARD_CELLS]
+
+        # which cells can be owned, and their positions, so loops over the
+        # properties can skip other cells
+        self.ownable = tuple(cell.kind == KIND_PROPERTY for cell in self.b)
+        self.property_indices = tuple(i for i, own in enumerate(self.ownable) if own)
+
+        # positions of the properties of each group
+        group_indices = {}
+        for i in self.property_indices:
+            group_indices.setdefault(self.b[i].group, []).append(i)
+        self.group_indices = {
+            group: tuple(indices) for group, indices in group_indices.items()
+        }
 
         # number of built houses and hotels (to limit when needed)
         self.nHouses = 0
         self.nHotels = 0
 
+        # groups and players whose plots changed since the last recalculation
+        self.dirty_groups = set()
+        self.dirty_players = set()
+
+        # counts changes of plots (owner, mortgage, buildings), for caching
+        self.version = 0
+
         # Chance
-        self.chanceCards = [i for i in range(16)]
-        random_shuffle.shuffle(self.chanceCards)
+        self.chanceCards = Deck(16)
 
         # Community Chest
-        self.communityCards = [i for i in range(16)]
-        random_shuffle.shuffle(self.communityCards)
+        self.communityCards = Deck(16)
+
+        # dice for the game, rolled nMoves pairs at a time
+        self.dice_pool = DicePool(rng, nMoves)
+
+    # Clear the board for a new game: no owners or buildings, shuffled cards, new dice
+    # (one_game calls it, so the cards and dice come from that game's seed only)
+    # (players are reset separately, that clears their rail counts)
+    def reset(self):
+        for i in self.property_indices:
+            plot = self.b[i]
+            plot.owner = None
+            plot.is_mortgaged = False
+            plot.is_monopoly = False
+            plot.hasHouses = 0
+        self.nHouses = 0
+        self.nHotels = 0
+        self.dirty_groups = set()
+        self.dirty_players = set()
+        self.alive = len(self.players)  # players not bankrupt yet
+        self.version += 1
+        self.chanceCards.reset()
+        self.communityCards.reset()
+        self.dice_pool.reset(rng)
 
     # Does the board have at least one monopoly
     # Used for statistics
     def has_monopoly(self):
-        for i in range(len(self.b)):
-            if self.b[i].is_monopoly:
-                return True
-        return False
+        return any(self.b[i].is_monopoly for i in self.property_indices)
 
-    # Count the number of rails of the same owner as "position"
-    # Used in rent calculations
-    def count_rails(self, position):
-        railcount = 0
-        this_owner = self.b[position].owner
-        if this_owner:
-            for plot in self.b:
-                if (
-                    type(plot) == Property
-                    and plot.group == "rail"
-                    and plot.owner == this_owner
-                ):
-                    railcount += 1
-        return railcount
+    # Check if there are more then 1 player left in the game
+    def is_game_over(self):
+        return self.alive < 2
 
     # What is the rent of plot "position"
     # Takes into account utilities, rails, monopoly
 
     def calculate_rent(self, position, dice, special=""):
-        if type(self.b[position]) == Property:
-            rent = 0
-            dice_value = sum(dice)
-
-            # utility
-            if self.b[position].group == "util":
-                if self.b[position].is_monopoly or special == "from_chance":
-                    rent = dice_value * 10
-                else:
-                    rent = dice_value * 4
-
-            # rail
-            elif self.b[position].group == "rail":
-                rails = self.count_rails(position)
-                rent = 25 * rails
-                if special == "from_chance":
-                    rent *= 2
-
-            # usual property
-            else:
-                if self.b[position].hasHouses > 0:
-                    if self.b[position].hasHouses - 1 > 5:
-                        print(self.b[position].hasHouses - 1)
-                        print(position)
-                        self.print_map()
-                    rent = self.b[position].rent_house[self.b[position].hasHouses - 1]
-                elif self.b[position].is_monopoly:
-                    rent = 2 * self.b[position].rent_base
-                else:
-                    rent = self.b[position].rent_base
-        return rent
+        plot = self.b[position]
+        if plot.kind != KIND_PROPERTY:
+            return 0
+        group = plot.group
+
+        # utility
+        if group == "util":
+            dice_value = dice[0] + dice[1]
+            if plot.is_monopoly or special == "from_chance":
+                return dice_value * 10
+            return dice_value * 4
+
+        # rail
+        if group == "rail":
+            rent = 25 * plot.owner.n_railroads if plot.owner is not None else 0
+            if special == "from_chance":
+                rent *= 2
+            return rent
+
+        # usual property
+        houses = plot.hasHouses
+        if houses > 0:
+            return plot.rent_house[houses - 1]
+        if plot.is_monopoly:
+            return 2 * plot.rent_base
+        return plot.rent_base
 
     # What % of plots of this group does player have
     # Used in calculation of least valuable property
     def share_of_group(self, group, player):
-        total = 0
-        owned = 0
-        for plot in self.b:
-            if type(plot) == Property and plot.group == group:
-                total += 1
-                if plot.owner == player:
-                    owned += 1
-        return owned / total
+        indices = self.group_indices[group]
+        owned = sum(1 for i in indices if self.b[i].owner == player)
+        return owned / len(indices)
 
     # What is the least valuable property / building
     # Used to pick what to mortgage / sell buildings
@@ -1197,13 +1364,9 @@ class Board:
     def choose_property_to_mortgage_downgrade(self, player):
         # list all the items this player has:
         owned_stuff = []
-        for i in range(len(self.b)):
+        for i in self.property_indices:
             plot = self.b[i]
-            if (
-                type(plot) == Property
-                and not plot.is_mortgaged
-                and plot.owner == player
-            ):
+            if not plot.is_mortgaged and plot.owner == player:
                 owned_stuff.append(
                     (
                         i,
@@ -1214,115 +1377,113 @@ class Board:
                     )
                 )
         if len(owned_stuff) == 0:
-            return False
+            return None
         # first to sel/mortgage are: least "monopolistic"; most houses
         owned_stuff.sort(key=lambda x: (x[3], -x[4]))
         return owned_stuff[0][0]
 
     # Chose Property to build the next house/hotel according to its value and available money
     def list_property_to_build(self, player):
-        # list all the items this player could built on:
-        to_build_stuff = []
+        b = self.b
+        is_exp = player.name == "exp"
+        # list all the plots this player could built on:
+        to_build = []
         # smaller level of improvement in the group (to prevent unequal improvement)
         min_in_group = {}
         # start with listing all their monopolies
-        for i in range(len(self.b)):
-            plot = self.b[i]
+        for i in self.property_indices:
+            plot = b[i]
             if (
-                type(plot) == Property
-                and self.b[i].is_monopoly
+                plot.is_monopoly
                 and plot.owner == player
                 and plot.group != "rail"
                 and plot.group != "util"
                 and plot.hasHouses < 5
-            ):
                 # limit max houses experiment
-                if not (player.name == "exp" and expHouseBuildLimit == plot.hasHouses):
-                    to_build_stuff.append(
-                        (
-                            i,
-                            plot.name,
-                            plot.group,
-                            plot.hasHouses,
-                            plot.cost_house,
-                            plot.cost_base,
-                        )
-                    )
-                    if plot.group in min_in_group:
-                        min_in_group[plot.group] = min(
-                            plot.hasHouses, min_in_group[plot.group]
-                        )
-                    else:
-                        min_in_group[plot.group] = plot.hasHouses
-        if len(to_build_stuff) == 0:
+                and not (is_exp and expHouseBuildLimit == plot.hasHouses)
+            ):
+                to_build.append(i)
+                least = min_in_group.get(plot.group)
+                if least is None or plot.hasHouses < least:
+                    min_in_group[plot.group] = plot.hasHouses
+        if len(to_build) == 0:
             return []
 
         # remove those that has more houses than other plots in monopoly (to ensure gradual development)
-        to_build_stuff.sort(key=lambda x: (x[2], x[3]))
-        for i in range(len(to_build_stuff) - 1, -1, -1):
-            # if it has more houses than minimum in that group, remove
-            if to_build_stuff[i][3] > min_in_group[to_build_stuff[i][2]]:
-                if not settingsAllowUnEqualDevelopment:
-                    to_build_stuff.pop(i)
-
-        # sort by house price and base
+        if not settingsAllowUnEqualDevelopment:
+            to_build = [
+                i for i in to_build if b[i].hasHouses == min_in_group[b[i].group]
+            ]
+
+        # sort by house price and base, then by group and houses
+        # (the sort is stable, so the board order breaks the remaining ties)
         if behaveBuildRandom:
-            random_shuffle.shuffle(to_build_stuff)
+            to_build.sort(key=lambda i: (b[i].group, b[i].hasHouses))
+            rng.shuffle(to_build)
         elif behaveBuildCheapest:
-            to_build_stuff.sort(key=lambda x: (-x[4], -x[5]))
+            to_build.sort(
+                key=lambda i: (
+                    -b[i].cost_house,
+                    -b[i].cost_base,
+                    b[i].group,
+                    b[i].hasHouses,
+                )
+            )
         else:
-            to_build_stuff.sort(key=lambda x: (x[4], x[5]))
-
-        if expBuildCheapest and player.name == "exp":
-            to_build_stuff.sort(key=lambda x: (-x[4], -x[5]))
-        if expBuildExpensive and player.name == "exp":
-            to_build_stuff.sort(key=lambda x: (x[4], x[5]))
-
-        if expBuildThree and player.name == "exp":
-            has_less_than_three = False
-            for i in range(len(to_build_stuff)):
-                if to_build_stuff[i][3] < 3:
-                    has_less_than_three = True
-            if has_less_than_three:
-                for i in range(len(to_build_stuff) - 1, -1, -1):
-                    if to_build_stuff[i][3] >= 3:
-                        del to_build_stuff[i]
-            to_build_stuff.sort(key=lambda x: (x[3], x[4], x[5]))
-            # if len(to_build_stuff)>3:
-            #    print (to_build_stuff)
-
-        # if len(to_build_stuff)>5:
-        # print (to_build_stuff)
-        return to_build_stuff
-
-    @staticmethod
-    def choose_property_to_build(player, available_money):
-        for i in range(len(player.plots_to_build) - 1, -1, -1):
-            if player.plots_to_build[i][4] <= available_money:
-                return player.plots_to_build[i][0]
-        return False
+            to_build.sort(
+                key=lambda i: (
+                    b[i].cost_house,
+                    b[i].cost_base,
+                    b[i].group,
+                    b[i].hasHouses,
+                )
+            )
+
+        if is_exp:
+            if expBuildCheapest:
+                to_build.sort(key=lambda i: (-b[i].cost_house, -b[i].cost_base))
+            if expBuildExpensive:
+                to_build.sort(key=lambda i: (b[i].cost_house, b[i].cost_base))
+            if expBuildThree:
+                if any(b[i].hasHouses < 3 for i in to_build):
+                    to_build = [i for i in to_build if b[i].hasHouses < 3]
+                to_build.sort(
+                    key=lambda i: (b[i].hasHouses, b[i].cost_house, b[i].cost_base)
+                )
+
+        return to_build
+
+    # the last plot on the build list the player can afford
+    def choose_property_to_build(self, player, available_money):
+        for i in reversed(player.plots_to_build):
+            if self.b[i].cost_house <= available_money:
+                return i
+        return None
 
     # Build one house/hotel with available money
     # return True if built, so this function will be called again
 
     def improve_property(self, player, available_money):
         property_to_improve = self.choose_property_to_build(player, available_money)
-        if type(property_to_improve) == bool and not property_to_improve:
+        if property_to_improve is None:
             return False
 
         # Check if we reached the limit of available Houses/Hotels
         this_is_hotel = True if self.b[property_to_improve].hasHouses == 4 else False
         if this_is_hotel:
             if self.nHotels == settingHotelLimit:
-                log.write("reached hotel limit", 3)
+                if LOG_ENABLED:
+                    log.write("reached hotel limit", 3)
                 return False
         else:
             if self.nHouses == settingHouseLimit:
-                log.write("reached house limit", 3)
+                if LOG_ENABLED:
+                    log.write("reached house limit", 3)
                 return False
 
         # add a building
         self.b[property_to_improve].hasHouses += 1
+        self.version += 1
         # add to the counter
         if this_is_hotel:
             self.nHotels += 1
@@ -1330,14 +1491,13 @@ class Board:
         else:
             self.nHouses += 1
 
-        log.write(
-            player.name
-            + " builds house N"
-            + str(self.b[property_to_improve].hasHouses)
-            + " on "
-            + self.b[property_to_improve].name,
-            3,
-        )
+        if LOG_ENABLED:
+            log.write(
+                f"{player.name} builds house "
+                f"N{self.b[property_to_improve].hasHouses} on "
+                f"{self.b[property_to_improve].name}",
+                3,
+            )
         player.take_money(self.b[property_to_improve].cost_house)
         player.plots_to_build = self.list_property_to_build(player)
         return True
@@ -1345,114 +1505,104 @@ class Board:
     # When player is bankrupt - return all their property to market
 
     def sell_all(self, player):
-        for plot in self.b:
-            if type(plot) == Property and plot.owner == player:
-                plot.owner = None
+        for i in self.property_indices:
+            plot = self.b[i]
+            if plot.owner == player:
+                self.set_owner(plot, None)
                 plot.is_mortgaged = False
 
-    # Get the list of plots player would want to get
-    # that is he lacks one to for a monopoly
-
-    def get_list_of_wanted_plots(self, player):
-        groups = {}
-        for plot in self.b:
-            if plot.group != "":
-                if plot.group in groups:
-                    groups[plot.group][0] += 1
-                else:
-                    groups[plot.group] = [1, 0]
-                if plot.owner == player:
-                    groups[plot.group][1] += 1
+    # Change the owner of the plot, keeping the players' rail counts
+    def set_owner(self, plot, owner):
+        self.mark_dirty(plot)
+        if plot.group == "rail":
+            if plot.owner is not None:
+                plot.owner.n_railroads -= 1
+            if owner is not None:
+                owner.n_railroads += 1
+        plot.owner = owner
+        self.mark_dirty(plot)
+
+    # Remember that the plot changed (owner, mortgage, buildings), so its group
+    # and owner are recalculated by recalculate_after_property_change
+    def mark_dirty(self, plot):
+        self.version += 1
+        self.dirty_groups.add(plot.group)
+        if plot.owner is not None:
+            self.dirty_players.add(plot.owner)
+
+    # Get the lists of plots player would want to get (he lacks one to for a
+    # monopoly) and would offer for trade (the one plot he has in a group)
+
+    def get_wanted_and_offered_plots(self, player):
         wanted = []
-        for group in groups:
-            if group != "util" and groups[group][0] - groups[group][1] == 1:
-                for i in range(len(self.b)):
-                    if (
-                        type(self.b[i]) == Property
-                        and self.b[i].group == group
-                        and self.b[i].owner != player
-                    ):
-                        wanted.append(i)
-        return sorted(wanted)
-
-    # Get the list of plots player would want to offer for trade
-    # that one random plot in a group
-    def get_list_of_offered_plots(self, player):
-        groups = {}
-        for plot in self.b:
-            if plot.group != "":
-                if plot.group not in groups:
-                    groups[plot.group] = 0
-                if plot.owner == player:
-                    groups[plot.group] += 1
         offered = []
-        for group in groups:
-            if group != "util" and groups[group] == 1:
-                for i in range(len(self.b)):
-                    if (
-                        type(self.b[i]) == Property
-                        and self.b[i].group == group
-                        and self.b[i].owner == player
-                        and not self.b[i].is_mortgaged
-                    ):
-                        offered.append(i)
-        return sorted(offered)
-
-    # update isMonopoly status for all plots
-    def check_monopolies(self):
-        groups = {}
-        for i in range(len(self.b)):
-            plot = self.b[i]
-            if type(plot) == Property:
-                if plot.owner is None:
-                    groups[plot.group] = False
-                else:
-                    if plot.group in groups:
-                        if groups[plot.group] != plot.owner:
-                            groups[plot.group] = False
-                    else:
-                        groups[plot.group] = plot.owner
-        for i in range(len(self.b)):
-            plot = self.b[i]
-            if type(plot) == Property:
-                if groups[plot.group]:
-                    plot.is_monopoly = True
+        for group, indices in self.group_indices.items():
+            if group == "util":
+                continue
+            owned = []
+            missing = []
+            for i in indices:
+                if self.b[i].owner == player:
+                    owned.append(i)
                 else:
-                    plot.is_monopoly = False
+                    missing.append(i)
+            if len(missing) == 1:
+                wanted.append(missing[0])
+            if len(owned) == 1 and not self.b[owned[0]].is_mortgaged:
+                offered.append(owned[0])
+        return sorted(wanted), sorted(offered)
+
+    # update isMonopoly status for plots of the changed groups
+    def check_monopolies(self):
+        for group in self.dirty_groups:
+            indices = self.group_indices[group]
+            owner = self.b[indices[0]].owner
+            is_monopoly = owner is not None and all(
+                self.b[i].owner is owner for i in indices[1:]
+            )
+            for i in indices:
+                self.b[i].is_monopoly = is_monopoly
 
     # calculating heavy tasks that we want to do after property change:
     # list of wanted and offered properties for each player
+    # (only players whose plots changed, their lists don't depend on the others)
     def recalculate_after_property_change(self):
         self.check_monopolies()
         for player in self.players:
-            player.plots_wanted = self.get_list_of_wanted_plots(player)
-            player.plots_offered = self.get_list_of_offered_plots(player)
-            player.plots_to_build = self.list_property_to_build(player)
+            if player in self.dirty_players:
+                wanted, offered = self.get_wanted_and_offered_plots(player)
+                player.plots_wanted = wanted
+                player.plots_offered = frozenset(offered)
+                player.plots_to_build = self.list_property_to_build(player)
+        self.dirty_groups.clear()
+        self.dirty_players.clear()
 
     # perform action for a player on a plot
 
     def action(self, player, position, special=""):
+        self.action_cell(player, self.b[position], position, special)
+
+    # perform action for a player on a plot the caller already looked up
+
+    def action_cell(self, player, cell, position, special=""):
 
+        kind = cell.kind
         # Landed on a property - calculate rent first
-        if type(self.b[position]) == Property:
+        if kind == KIND_PROPERTY:
             # calculate the rent one would have to pay (but not pay it yet)
             rent = self.calculate_rent(position, dice=player.dice, special=special)
             # pass action to to the cell
-            self.b[position].action(player, rent, self)
+            cell.action(player, rent, self)
         # landed on a chance, pass board, to track the chance cards
-        elif (
-            type(self.b[position]) == Chance
-            or type(self.b[position]) == Community
-            or type(self.b[position]) == PropertyTax
-        ):
-            self.b[position].action(player, self)
+        elif kind == KIND_CHANCE or kind == KIND_COMMUNITY or kind == KIND_PROPERTY_TAX:
+            cell.action(player, self)
         # other cells
         else:
-            self.b[position].action(player)
+            cell.action(player)
 
     def print_map(self):
         for i in range(len(self.b)):
-            if type(self.b[i]) == Property:
+            if self.ownable[i]:
                 print(
                     i,
                     self.b[i].name,
@@ -1469,18 +1619,6 @@ class Board:
                 # print (i, type(self.b[i]))
 
 
-def is_game_over(players):
-    """Check if there are more then 1 player left in the game"""
-    alive = 0
-    for player in players:
-        if not player.is_bankrupt:
-            alive += 1
-    if alive > 1:
-        return False
-    else:
-        return True
-
-
 # simulate one game
 
 
@@ -1495,73 +1633,70 @@ def build_player_list(n: int, starting_monies=[]):
         starting_monies = [
             var_starting_money[i % len(var_starting_money)] for i in range(n)
         ]
-    players_attributes = []
-    for i in range(n):
-        player_attributes = (names[i], starting_monies[i])
-        players_attributes.append(player_attributes)
-    if shuffle_players:
-        random_shuffle.shuffle(players_attributes)
-    players = [Player(pa[0], pa[1]) for pa in players_attributes]
+    players = [Player(names[i], starting_monies[i]) for i in range(n)]
     return players
 
 
-def one_game():
+def one_game(game_board):
 
-    # create players
-    players = build_player_list(n_players)
-
-    # create board
-    game_board = Board(players)
+    # players and board are reused from the previous game, reset them
+    players = game_board.players
+    if shuffle_players:
+        # shuffle from the same seat order every game, not from the order the
+        # previous game in this process left, so a game depends on its seed only
+        players.sort(key=lambda player: player.name)
+        rng.shuffle(players)
+    for player in players:
+        player.reset()
+    game_board.reset()
 
     #  net_worth history first point
-    if writeData == "net_worth":
-        networthstring = ""
-        for player in players:
-            networthstring += str(player.net_worth(game_board))
-            if player != players[-1]:
-                networthstring += "\t"
-        log.write(networthstring, data=True)
+    track_net_worth = writeData == "net_worth"
+    if track_net_worth:
+        net_worths = [[player.net_worth(game_board) for player in players]]
 
     # game
     for i in range(nMoves):
         if realTime:
+            log.flush()
             input("Press enter to continue")
-        if is_game_over(players):
+        if game_board.is_game_over():
             # to track length of the game
             if writeData == "last_turn":
                 log.write(str(i - 1), data=True)
             break
 
-        log.write("TURN " + str(i + 1), 1)
-        for player in players:
-            if player.money > 0:
-                log.write(
-                    f"{f'{player.name}: ':8} ${player.money} | position:"
-                    + str(player.position),
-                    2,
-                )
+        if LOG_ENABLED:
+            log.write(f"TURN {i + 1}", 1)
+            for player in players:
+                if player.money > 0:
+                    log.write(
+                        f"{f'{player.name}: ':8} ${player.money} | position:"
+                        f"{player.position}",
+                        2,
+                    )
 
         for player in players:
-            if not is_game_over(players):  # Only continue if 2 or more players
-                # returns True if player has to go again
-                while player.make_a_move(game_board):
-                    pass
+            if game_board.is_game_over():  # Only continue if 2 or more players
+                break
+            # returns True if player has to go again
+            while player.make_a_move(game_board):
+                pass
 
         # track net_worth history of the game
-        if writeData == "net_worth":
-            networthstring = ""
-            for player in players:
-                networthstring += str(player.net_worth(game_board))
-                if player != players[-1]:
-                    networthstring += "\t"
-            log.write(networthstring, data=True)
+        if track_net_worth:
+            net_worths.append([player.net_worth(game_board) for player in players])
+
+    # net_worth history goes to data.bin in one block
+    if track_net_worth:
+        log.write(np.array(net_worths, dtype=np.int32).tobytes(), data=True)
 
     # tests
     # for player in players:
     # player.threeWayTrade(game_board)
 
-    # return final scores
-    results = [players[i].get_money() for i in range(n_players)]
+    # return final scores (a plain list is what gets sent back from a worker)
+    results = [player.get_money() for player in players]
 
     # if it is an only simulation, print map and final score
     if nSimulations == 1 and showMap:
@@ -1571,83 +1706,149 @@ def one_game():
     return results
 
 
-def run_simulation():
-    """run multiple game simulations"""
-    results = []
+# board (with its players) of this process, made for the first game it plays
+game_board = None
 
-    if show_progress_bar:
-        widgets = [progressbar.Percentage(), progressbar.Bar(), progressbar.ETA()]
-        pbar = progressbar.ProgressBar(
-            widgets=widgets, term_width=OUT_WIDTH, maxval=nSimulations
-        )
-        pbar.start()
 
-    for i in range(nSimulations):
+def run_one(game):
+    """Play one game (number, seed), return its results and data lines"""
+    global rng, game_board
+    number, seed = game
+    rng = np.random.default_rng(seed)
+    if game_board is None:
+        game_board = Board(build_player_list(n_players))
 
-        if show_progress_bar:
-            pbar.update(i + 1)
+    if LOG_ENABLED:
+        log.write(f"{'=' * 10} GAME {number} {'=' * 10}\n")
+    results = one_game(game_board)
+    return results, log.take_lines()
 
-        log.write("=" * 10 + " GAME " + str(i + 1) + " " + "=" * 10 + "\n")
 
-        # remaining players - add to the results list
-        results.append(one_game())
+def init_worker():
+    """Set up a worker process to play games"""
+    global log
+    log = WorkerLog()
+
+
+def play_games(seeds):
+    """Play games with these seeds, in worker processes if possible"""
+    games = enumerate(seeds, 1)
+    # game log and step by step execution need the games in order, in this process
+    if n_processes == 1 or nSimulations == 1 or writeLog or realTime:
+        yield from map(run_one, games)
+        return
+    processes = n_processes or multiprocessing.cpu_count()
+    # about 8 chunks per worker: few round trips, but the load still evens out
+    chunksize = max(1, nSimulations // (processes * 8))
+    with multiprocessing.Pool(processes, initializer=init_worker) as pool:
+        # in game order, so the data files don't depend on the number of workers
+        yield from pool.imap(run_one, games, chunksize=chunksize)
+
+
+def run_simulation():
+    """run multiple game simulations, return the results and the data counts"""
+    # final money of the players, a row per game (int16 could overflow)
+    results = np.empty((nSimulations, n_players), dtype=np.int32)
+    # data lines counted as they come, so data.txt isn't read back to count them
+    data_counts = collections.Counter() if DATA_COUNTED else None
+
+    # each game has its own seed and starts from a fresh board and seat order,
+    # so the results don't depend on which process plays it, or how many there are
+    seeds = np.random.SeedSequence(SEED).spawn(nSimulations)
+    # check the progress bar every 0.1% of the games, redraw it at most 4 times a second
+    games = tqdm(
+        play_games(seeds),
+        total=nSimulations,
+        disable=not show_progress_bar,
+        miniters=max(1, nSimulations // 1000),
+        mininterval=0.25,
+        ncols=OUT_WIDTH,
+    )
+    for i, (game_results, data_lines) in enumerate(games):
+
+        # data lines of the game, in one write
+        log.write_data(data_lines)
+        if DATA_COUNTED:
+            data_counts.update(data_lines)
+
+        # remaining players - add to the results
+        results[i] = game_results
 
         # write remaining players in a data log
         if writeData == "remaining_players":
-            rem_players = sum([1 for r in results[-1] if r > 0])
-            log.write(str(rem_players), data=True)
+            rem_players = sum([1 for r in game_results if r > 0])
+            log.write_data([bytes((rem_players,))])
+            data_counts[str(rem_players)] += 1
 
-    if show_progress_bar:
-        pbar.finish()
+        # let log.txt be watched game by game
+        if writeLog:
+            log.flush()
 
-    return results
+    return results, data_counts
 
 
 def analyze_results(results):
     """Analyze results"""
 
-    remaining_players = [
-        0,
-    ] * n_players
-    for result in results:
-        alive = 0
-        for score in result:
-            if score >= 0:
-                alive += 1
-        remaining_players[alive - 1] += 1
+    # count games by the number of players still in the game at the end
+    alive = np.count_nonzero(np.asarray(results) >= 0, axis=1)
+    remaining_players = np.bincount(alive - 1, minlength=n_players).tolist()
 
     if showRemPlayers:
         print("Remaining:", remaining_players)
 
 
-def analyze_data():
+# data files at least this big are counted from a memory map
+MMAP_THRESHOLD = 1 << 24
 
-    if (
-        writeData == "losers_names"
-        or writeData == "experiment"
-        or writeData == "remaining_players"
-    ):
-        groups = {}
-        with open("data.txt", "r") as fs:
-            for line in fs:
-                item = line.strip()
-                if item in groups:
-                    groups[item] += 1
-                else:
-                    groups[item] = 1
-        experiment = 0
-        control = 0
-        for item in sorted(groups.keys()):
-            count = groups[item] / nSimulations
-
-            if writeData == "losers_names":
-                count = 1 - count
-            if item == "exp":
-                experiment = count
-            else:
-                control += count
 
-            margin = 1.96 * math.sqrt(count * (1 - count) / nSimulations)
+def count_data_lines(path):
+    """Count how many times each line appears in a data file"""
+    if os.path.getsize(path) < MMAP_THRESHOLD:
+        with open(path, "r") as fs:
+            return collections.Counter(line.strip() for line in fs)
+
+    # big file: split it in one go, and decode each distinct line only once
+    with open(path, "rb") as fs:
+        with mmap.mmap(fs.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            raw_counts = collections.Counter(mm.read().split(b"\n"))
+    counts = collections.Counter()
+    for item, count in raw_counts.items():
+        item = item.strip()
+        if item:  # the empty line after the last newline
+            counts[item.decode()] += count
+    return counts
+
+
+def count_data_bytes(path):
+    """Count how many times each byte value appears in a binary data file"""
+    counts = np.bincount(np.fromfile(path, dtype=np.uint8)).tolist()
+    return collections.Counter({str(n): c for n, c in enumerate(counts) if c})
+
+
+def analyze_data(groups=None):
+    """Report the data of the run, groups are the data lines counts if known"""
+
+    if DATA_COUNTED:
+        # no counts given: count the lines of a data file from an earlier run
+        if groups is None and DATA_BINARY:
+            groups = count_data_bytes(DATA_FILE)
+        elif groups is None:
+            groups = count_data_lines(DATA_FILE)
+        labels = sorted(groups)
+        counts = np.fromiter(
+            (groups[item] for item in labels), dtype=np.float64, count=len(labels)
+        )
+        counts /= nSimulations
+        if writeData == "losers_names":
+            counts = 1 - counts
+        margins = 1.96 * np.sqrt(counts * (1 - counts) / nSimulations)
+
+        is_exp = np.array([item == "exp" for item in labels], dtype=np.bool_)
+        experiment = counts[is_exp].sum()
+        control = counts[~is_exp].sum()
+
+        for item, count, margin in zip(labels, counts, margins):
             print("{}: {:.1%} +- {:.1%}".format(item, count, margin))
 
         if experiment != 0:
@@ -1655,14 +1856,16 @@ def analyze_data():
 
     if writeData == "net_worth":
         print("graph here")
-        npdata = np.transpose(np.loadtxt("data.txt", dtype=int, delimiter="\t"))
-        x = np.arange(0, max([len(d) for d in npdata]))
+        # a row per turn, a column per player
+        npdata = np.fromfile(DATA_FILE, dtype=np.int32).reshape(-1, n_players)
+        x = np.arange(npdata.shape[0])
 
         plt.ioff()
         fig, ax = plt.subplots()
-        for i in range(n_players):
-            ax.plot(x, npdata[i], label="1")
-        plt.savefig("fig" + str(time.time()) + ".png")
+        # one line per player, drawn in one call
+        ax.plot(x, npdata)
+        fig.savefig("fig" + str(time.time()) + ".png", dpi=100)
+        plt.close(fig)
 
 
 if __name__ == "__main__":
@@ -1681,8 +1884,8 @@ if __name__ == "__main__":
         " Seed:",
         SEED,
     )
-    results = run_simulation()
+    results, data_counts = run_simulation()
     analyze_results(results)
     log.close()
-    analyze_data()
+    analyze_data(data_counts)
     print("Done in {:.2f}s".format(time.time() - t))